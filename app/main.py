@@ -1,65 +1,121 @@
 from __future__ import annotations
 
 import os
+from contextlib import asynccontextmanager
+
 import httpx
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from chatkit import router as chatkit_router
+from fastapi.responses import ORJSONResponse
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY environment variable not set")
 
-app = FastAPI(title="ELS Agent Backend")
+# Optional: only /api/chatkit needs it, and it reports a 500 when unset.
+CHATKIT_WORKFLOW_ID = os.getenv("CHATKIT_WORKFLOW_ID")
+
+# ENV=dev (set by scripts/run.sh) allows any origin by default. Every other
+# deployment must list its frontend origins in CORS_ALLOW_ORIGINS,
+# comma-separated, e.g. "https://app.example.com,https://admin.example.com".
+ENV = os.getenv("ENV", "production")
+
+CORS_ALLOW_ORIGINS = frozenset(
+    origin.strip()
+    for origin in os.getenv(
+        "CORS_ALLOW_ORIGINS", "*" if ENV == "dev" else ""
+    ).split(",")
+    if origin.strip()
+)
+
+if not CORS_ALLOW_ORIGINS:
+    raise RuntimeError(
+        "CORS_ALLOW_ORIGINS environment variable not set (or set ENV=dev)"
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.http = httpx.AsyncClient(
+        headers={
+            "Authorization": f"Bearer {OPENAI_API_KEY}",
+            "Content-Type": "application/json",
+            "OpenAI-Beta": "chatkit_beta=v1",
+        },
+        http2=True,
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=200),
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
+
+app = FastAPI(
+    title="ELS Agent Backend",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # allow all while debugging
-    allow_credentials=True,
+    allow_origins=sorted(CORS_ALLOW_ORIGINS),
+    # Credentials are never combined with a wildcard origin.
+    allow_credentials="*" not in CORS_ALLOW_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-app.include_router(chatkit_router)
-
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
+async def _create_chatkit_session(client: httpx.AsyncClient, workflow_id: str):
+    response = await client.post(
+        "https://api.openai.com/v1/chatkit/sessions",
+        content=orjson.dumps(
+            {
+                "workflow": {"id": workflow_id},
+                "user": "local-user-1",
+            }
+        ),
+    )
+
+    if response.status_code != 200:
+        return ORJSONResponse(
+            {"error": response.text},
+            status_code=500
+        )
+
+    data = orjson.loads(response.content)
+
+    return {
+        "client_secret": data.get("client_secret")
+    }
+
 @app.post("/api/create-session")
-async def create_session(payload: dict):
+async def create_session(payload: dict, request: Request):
     workflow_id = payload.get("workflow", {}).get("id")
 
     if not workflow_id:
-        return JSONResponse(
+        return ORJSONResponse(
             {"error": "Missing workflow id"},
             status_code=400
         )
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.openai.com/v1/chatkit/sessions",
-            headers={
-                "Authorization": f"Bearer {OPENAI_API_KEY}",
-                "Content-Type": "application/json",
-                "OpenAI-Beta": "chatkit_beta=v1",
-            },
-            json={
-    "workflow": {"id": workflow_id},
-    "user": "local-user-1"
-},
-        )
+    return await _create_chatkit_session(request.app.state.http, workflow_id)
 
-    if response.status_code != 200:
-        return JSONResponse(
-            {"error": response.text},
+@app.post("/api/chatkit")
+async def chatkit(request: Request):
+    if not CHATKIT_WORKFLOW_ID:
+        return ORJSONResponse(
+            {"error": "CHATKIT_WORKFLOW_ID environment variable not set"},
             status_code=500
         )
 
-    data = response.json()
-
-    return {
-        "client_secret": data.get("client_secret")
-    }
+    return await _create_chatkit_session(
+        request.app.state.http, CHATKIT_WORKFLOW_ID
+    )
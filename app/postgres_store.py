@@ -1,18 +1,130 @@
 from __future__ import annotations
 
-import json
+import ssl
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
 import asyncpg
+import certifi
+import orjson
 from chatkit.store import NotFoundError, Store
 from chatkit.types import Attachment, Page, ThreadItem, ThreadMetadata
 
 
+def _verifying_context(check_hostname: bool) -> ssl.SSLContext:
+    ctx = ssl.create_default_context(cafile=certifi.where())
+    ctx.check_hostname = check_hostname
+    return ctx
+
+
+def _encrypt_only_context() -> ssl.SSLContext:
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+# One reusable context per libpq sslmode, each keeping that mode's meaning:
+# require encrypts only, verify-ca checks the chain, verify-full also checks
+# the hostname.
+_SSL_CONTEXTS = {
+    "require": _encrypt_only_context(),
+    "verify-ca": _verifying_context(check_hostname=False),
+    "verify-full": _verifying_context(check_hostname=True),
+}
+
+
+def _ssl_for_dsn(database_url: str) -> ssl.SSLContext | None:
+    # Other sslmodes, or a DSN naming its own sslrootcert, are left for
+    # asyncpg to apply as written.
+    query = parse_qs(urlsplit(database_url).query)
+    if "sslrootcert" in query:
+        return None
+    sslmode = query.get("sslmode", [None])[-1]
+    return _SSL_CONTEXTS.get(sslmode)
+
+
+# jsonb's binary wire format is the JSON text prefixed with a version byte.
+_JSONB_VERSION = b"\x01"
+
+
+def _encode_jsonb(value) -> bytes:
+    return _JSONB_VERSION + orjson.dumps(value)
+
+
+def _decode_jsonb(data: bytes):
+    return orjson.loads(data[1:])
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=_encode_jsonb,
+        decoder=_decode_jsonb,
+        schema="pg_catalog",
+        format="binary",
+    )
+
+
+_ITEM_COLUMNS = ("id", "thread_id", "created_at", "role", "content", "raw")
+
+
+def _item_record(thread_id: str, item: ThreadItem) -> tuple:
+    return (
+        item.id,
+        thread_id,
+        item.created_at,
+        item.role,
+        item.content or {},
+        item.model_dump(),
+    )
+
+
+# Page cursors carry the last row's (created_at, id) so the next page can seek
+# straight past it, even if that row has since been deleted.
+_CURSOR_SEPARATOR = "|"
+
+
+def _encode_cursor(row: asyncpg.Record) -> str:
+    return f"{row['created_at'].isoformat()}{_CURSOR_SEPARATOR}{row['id']}"
+
+
+def _decode_cursor(after: str) -> tuple[datetime, str]:
+    created_at, sep, row_id = after.partition(_CURSOR_SEPARATOR)
+    if sep and row_id:
+        try:
+            return datetime.fromisoformat(created_at), row_id
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid page cursor {after!r}")
+
+
+def _order_clause(order: str) -> tuple[str, str]:
+    if order == "desc":
+        return "DESC", "<"
+    return "ASC", ">"
+
+
 class PostgresStore(Store[dict]):
     def __init__(self, pool: asyncpg.Pool):
         self.pool = pool
 
     @classmethod
-    async def create(cls, database_url: str) -> "PostgresStore":
-        pool = await asyncpg.create_pool(dsn=database_url)
+    async def create(
+        cls, database_url: str, min_size: int = 10, max_size: int = 50
+    ) -> "PostgresStore":
+        # Neon's pooled endpoints route each statement through pgbouncer, so
+        # prepared statements cached on one backend are not safe to reuse.
+        pool = await asyncpg.create_pool(
+            dsn=database_url,
+            ssl=_ssl_for_dsn(database_url),
+            min_size=min_size,
+            max_size=max_size,
+            max_inactive_connection_lifetime=300,
+            command_timeout=10,
+            statement_cache_size=0,
+            init=_init_connection,
+        )
         return cls(pool)
 
     async def load_thread(self, thread_id: str, context: dict) -> ThreadMetadata:
@@ -24,8 +136,8 @@ class PostgresStore(Store[dict]):
             if not row:
                 raise NotFoundError(f"Thread {thread_id} not found")
 
-            return ThreadMetadata(
-                id=row["id"],
+            return ThreadMetadata.model_construct(
+                id=str(row["id"]),
                 created_at=row["created_at"],
                 title=row["title"],
                 metadata=row["metadata"] or {},
@@ -44,7 +156,7 @@ class PostgresStore(Store[dict]):
                 thread.id,
                 thread.created_at,
                 thread.title,
-                json.dumps(thread.metadata or {}),
+                thread.metadata or {},
             )
 
     async def add_thread_item(
@@ -66,58 +178,114 @@ class PostgresStore(Store[dict]):
                     content=EXCLUDED.content,
                     raw=EXCLUDED.raw
                 """,
-                item.id,
-                thread_id,
-                item.created_at,
-                item.role,
-                json.dumps(item.content or {}),
-                json.dumps(item.model_dump()),
+                *_item_record(thread_id, item),
             )
 
+    async def save_items(
+        self, thread_id: str, items: list[ThreadItem], context: dict
+    ) -> None:
+        if not items:
+            return
+
+        # ON CONFLICT can't touch a row twice per statement; keep the last
+        # version of each item, as sequential save_item calls would.
+        latest = {item.id: item for item in items}
+        records = [_item_record(thread_id, item) for item in latest.values()]
+
+        # COPY has no upsert, so stage the batch in a temp table and merge it.
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    """
+                    CREATE TEMP TABLE chat_thread_items_staging
+                    (LIKE chat_thread_items INCLUDING DEFAULTS)
+                    ON COMMIT DROP
+                    """
+                )
+                await conn.copy_records_to_table(
+                    "chat_thread_items_staging",
+                    records=records,
+                    columns=_ITEM_COLUMNS,
+                )
+                await conn.execute(
+                    """
+                    INSERT INTO chat_thread_items
+                    (id, thread_id, created_at, role, content, raw)
+                    SELECT id, thread_id, created_at, role, content, raw
+                    FROM chat_thread_items_staging
+                    ON CONFLICT (id) DO UPDATE
+                    SET role=EXCLUDED.role,
+                        content=EXCLUDED.content,
+                        raw=EXCLUDED.raw
+                    """
+                )
+
     async def load_thread_items(
         self, thread_id: str, after: str | None, limit: int, order: str, context: dict
     ) -> Page[ThreadItem]:
-        direction = "DESC" if order == "desc" else "ASC"
+        direction, comparator = _order_clause(order)
+
+        args: list = [thread_id]
+        seek = ""
+        if after is not None:
+            args.extend(_decode_cursor(after))
+            seek = f" AND (created_at, id) {comparator} ($2, $3)"
+        args.append(limit + 1)
 
         async with self.pool.acquire() as conn:
             rows = await conn.fetch(
                 f"""
                 SELECT id, created_at, role, content, raw
                 FROM chat_thread_items
-                WHERE thread_id=$1
-                ORDER BY created_at {direction}
-                LIMIT $2
+                WHERE thread_id=$1{seek}
+                ORDER BY created_at {direction}, id {direction}
+                LIMIT ${len(args)}
                 """,
-                thread_id,
-                limit,
+                *args,
             )
 
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         items = [
             ThreadItem(**(row["raw"] or {}))
             for row in rows
         ]
 
-        return Page(data=items, has_more=False, after=None)
+        return Page(
+            data=items,
+            has_more=has_more,
+            after=_encode_cursor(rows[-1]) if rows else None,
+        )
 
     async def load_threads(
         self, limit: int, after: str | None, order: str, context: dict
     ) -> Page[ThreadMetadata]:
-        direction = "DESC" if order == "desc" else "ASC"
+        direction, comparator = _order_clause(order)
+
+        args: list = []
+        seek = ""
+        if after is not None:
+            args.extend(_decode_cursor(after))
+            seek = f" WHERE (created_at, id) {comparator} ($1, $2)"
+        args.append(limit + 1)
 
         async with self.pool.acquire() as conn:
             rows = await conn.fetch(
                 f"""
                 SELECT id, created_at, title, metadata
-                FROM chat_threads
-                ORDER BY created_at {direction}
-                LIMIT $1
+                FROM chat_threads{seek}
+                ORDER BY created_at {direction}, id {direction}
+                LIMIT ${len(args)}
                 """,
-                limit,
+                *args,
             )
 
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        # Rows come straight from our own table, so skip pydantic validation.
         threads = [
-            ThreadMetadata(
-                id=row["id"],
+            ThreadMetadata.model_construct(
+                id=str(row["id"]),
                 created_at=row["created_at"],
                 title=row["title"],
                 metadata=row["metadata"] or {},
@@ -125,12 +293,21 @@ class PostgresStore(Store[dict]):
             for row in rows
         ]
 
-        return Page(data=threads, has_more=False, after=None)
+        return Page(
+            data=threads,
+            has_more=has_more,
+            after=_encode_cursor(rows[-1]) if rows else None,
+        )
 
     async def delete_thread(self, thread_id: str, context: dict) -> None:
         async with self.pool.acquire() as conn:
             await conn.execute(
-                "DELETE FROM chat_threads WHERE id=$1",
+                """
+                WITH items AS (
+                    DELETE FROM chat_thread_items WHERE thread_id=$1
+                )
+                DELETE FROM chat_threads WHERE id=$1
+                """,
                 thread_id,
             )
 
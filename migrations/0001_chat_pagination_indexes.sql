@@ -0,0 +1,16 @@
+-- Indexes backing the keyset seeks in PostgresStore.load_thread_items and
+-- PostgresStore.load_threads.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so apply
+-- this file with autocommit on, e.g.:
+--
+--   psql "$DATABASE_URL" -f migrations/0001_chat_pagination_indexes.sql
+--
+-- If a concurrent build is interrupted it leaves an INVALID index behind;
+-- drop it and re-run this file.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS chat_thread_items_thread_ts_id
+ON chat_thread_items (thread_id, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS chat_threads_ts_id
+ON chat_threads (created_at, id);
@@ -37,6 +37,9 @@ fi
 
 export PYTHONPATH="$PROJECT_ROOT${PYTHONPATH:+:$PYTHONPATH}"
 
+# Local runs allow any CORS origin unless CORS_ALLOW_ORIGINS says otherwise.
+export ENV="${ENV:-dev}"
+
 echo "Starting Managed ChatKit backend on http://127.0.0.1:8000 ..."
 exec uvicorn app.main:app --reload --host 127.0.0.1 --port 8000
 